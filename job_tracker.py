@@ -1,147 +1,407 @@
 import os
 import json
 import re
-import smtplib
+import contextlib
 import time
-from datetime import datetime, timedelta
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import urlparse
 import requests
-from bs4 import BeautifulSoup
-import pickle
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from bs4 import BeautifulSoup, SoupStrainer
+import soupsieve
+import lxml.etree
+import lxml.html
+from lxml.etree import ParserError
 import base64
-from google.auth.transport.requests import Request
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
+
+try:
+    import orjson
+except ImportError:  # fall back to the standard library encoder
+    orjson = None
 
 # Gmail API setup
 SCOPES = ['https://www.googleapis.com/auth/gmail.readonly']
+# Gmail accepts at most 100 calls per batch request
+GMAIL_BATCH_SIZE = 100
+# Only the parts of a message the parser reads; MIME parts are nested up to three levels deep
+_PART_FIELDS = 'mimeType,body/data'
+GMAIL_MESSAGE_FIELDS = (
+    f'id,internalDate,payload({_PART_FIELDS},'
+    f'parts({_PART_FIELDS},parts({_PART_FIELDS},parts({_PART_FIELDS}))))'
+)
+GMAIL_SUBJECT_FIELDS = 'id,internalDate,payload/headers'
+# Widest Gmail search window, used when the last week has no newsletter; processed
+# emails older than this can't be listed again and are forgotten
+EMAIL_FALLBACK_DAYS = 30
+# Subjects of the newsletter; other search hits are skipped before their body is fetched
+_SUBJECT_RE = re.compile(r'\bfunded\b.*\bhiring\b', re.I)
+# Number of company pages scraped concurrently
+SCRAPE_WORKERS = 16
+# Concurrent requests allowed against one host (e.g. a shared ATS like jobs.lever.co)
+MAX_REQUESTS_PER_HOST = 2
+# Cap on jobs kept per page to prevent spam
+MAX_JOBS_PER_PAGE = 20
+# Longest Retry-After wait (in seconds) honoured when a job page is rate limited
+RETRY_AFTER_MAX = 5
+
+# Patterns used while parsing newsletter emails
+_PREFIX_RE = re.compile(r'^[•\-\*\s]+')
+# One sweep finds both company names (a line directly followed by a "Funding Amount:"
+# line, matched zero-width so URLs on that line are still found) and URLs
+_COMPANY_OR_URL_RE = re.compile(
+    r'^(?=[^\S\n]*(?P<company>\S[^\n]*?)[^\S\n]*\n[^\S\n]*Funding Amount:)'
+    r'|(?P<url>https?://[^\s\)]+)', re.M)
+# Newsletter and tracking links that are never a company website
+_SKIP_URL_RE = re.compile(
+    r'subscribe|unsubscribe|track|utm_|mailchi|email|newsletter|substack', re.I)
+# Newsletter boilerplate lines that never hold company info
+_SKIP_LINE_RE = re.compile(
+    r'funded & hiring|biweekly newsletter|subscribe|forwarded|'
+    r'startup funding|job alerts|stay up to date|sunday', re.I)
+
+# Engineering and legal roles are not tracked ('engineer' also covers 'engineering')
+EXCLUDE_KEYWORDS = [
+    'engineer', 'developer', 'software', 'frontend', 'backend', 'full stack',
+    'devops', 'sre', 'legal', 'counsel', 'attorney', 'lawyer', 'paralegal'
+]
+# Single alternation so a title is scanned once for all keywords
+_EXCLUDE_RE = re.compile('|'.join(map(re.escape, EXCLUDE_KEYWORDS)), re.I)
+
+# Attribute values that one of the job listing selectors could match
+_JOB_ATTR_RE = re.compile(r'opening|posting|job|position|role|bamboohr', re.I)
+
+def _is_job_candidate(name, attrs):
+    """SoupStrainer filter keeping only subtrees the job selectors can match"""
+    if name in ('a', 'h3'):
+        return True
+    return any(_JOB_ATTR_RE.search(attrs.get(attr, ''))
+               for attr in ('class', 'data-test', 'data-automation-id'))
+
+# Common job listing selectors for popular ATS platforms, in order of preference
+JOB_SELECTORS = [
+    # Greenhouse
+    '.opening',
+    '.opening-title',
+    '[data-test="job-title"]',
+    # Lever
+    '.posting-title',
+    '.posting',
+    # Workday
+    '[data-automation-id*="job"]',
+    # BambooHR
+    '.BambooHR-ATS-Jobs-Item',
+    # Generic patterns
+    '.job-title',
+    '.job-listing',
+    '.position',
+    '.role',
+    'h3 a[href*="job"]',
+    'a[href*="position"]',
+    'a[href*="career"]'
+]
+# Compiled once so each page only pays for matching
+_JOB_SELECTOR_PATTERNS = [soupsieve.compile(selector) for selector in JOB_SELECTORS]
+_JOB_SELECTOR_UNION = soupsieve.compile(', '.join(JOB_SELECTORS))
+# Every selector above needs one of these words somewhere in the raw markup
+_JOB_HINT_RE = re.compile(rb'job|career|position|opening|posting|role', re.I)
+
+# Only build the parts of a job page the selectors can match
+JOB_STRAINER = SoupStrainer(_is_job_candidate)
+
+# hrefs of links whose URL or text mentions careers/jobs/hiring/work
+_CAREERS_LINKS_XPATH = lxml.etree.XPath(
+    "//a[@href][re:test(@href, 'career|job|hiring|work', 'i')"
+    " or re:test(string(.), 'career|job|hiring|work', 'i')]/@href",
+    namespaces={'re': 'http://exslt.org/regular-expressions'})
+
+# Used for emails whose text is already decoded, whatever encoding they declare
+_UTF8_HTML_PARSER = lxml.html.HTMLParser(encoding='utf-8')
+
+def html_to_text(html_content):
+    """Strip HTML tags for basic text extraction"""
+    try:
+        try:
+            doc = lxml.html.document_fromstring(html_content)
+        except ValueError:
+            # lxml refuses str input that starts with an <?xml ... encoding=...?>
+            # declaration; parse the UTF-8 bytes instead, ignoring the declared encoding
+            doc = lxml.html.document_fromstring(html_content.encode('utf-8'),
+                                                parser=_UTF8_HTML_PARSER)
+    except ParserError:  # empty document
+        return ""
+    # Like BeautifulSoup's get_text(), leave out script and style contents
+    for element in doc.xpath('//script|//style'):
+        element.drop_tree()
+    return doc.text_content()
+
+def read_json(path):
+    """Load a JSON file"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    return orjson.loads(data) if orjson else json.loads(data)
+
+def write_json(path, data):
+    """Write data to a JSON file with 2-space indentation
+
+    The file is left untouched when its contents would not change, and is
+    otherwise replaced atomically so a failed run cannot truncate it.
+    """
+    if orjson:
+        encoded = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    else:
+        encoded = json.dumps(data, indent=2).encode('utf-8')
+    
+    try:
+        with open(path, 'rb') as f:
+            if f.read() == encoded:
+                return False
+    except FileNotFoundError:
+        pass
+    
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(encoded)
+    os.replace(tmp_path, path)
+    return True
 
 class JobTracker:
     def __init__(self):
         self.companies_file = 'companies.json'
         self.jobs_file = 'previous_jobs.json'
+        self.token_file = 'token.json'
+        self.page_cache_file = 'http_cache.json'
+        self.processed_emails_file = 'processed_emails.json'
+        # Optional sender address/domain used to narrow the newsletter search
+        self.newsletter_sender = os.environ.get('NEWSLETTER_SENDER')
+        self._gmail_service = None
+        self._smtp = None
+        self._scraped_urls = set()
+        # Names of the data sets modified since the last save_data()
+        self._dirty = set()
         self.load_data()
         
+        # Shared session so connections (and TLS handshakes) are reused across scrapes
+        self.http = requests.Session()
+        self.http.headers.update({
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+        })
+        # Rate-limited responses are retried after the server's Retry-After delay, capped
+        # so one host can't stall the run while it holds its request slot
+        retries = Retry(total=2, backoff_factor=0.3, status_forcelist=[429],
+                        respect_retry_after_header=True, retry_after_max=RETRY_AFTER_MAX,
+                        raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=SCRAPE_WORKERS, pool_maxsize=SCRAPE_WORKERS,
+                              max_retries=retries)
+        self.http.mount('https://', adapter)
+        self.http.mount('http://', adapter)
+        self._host_slots = {}
+        self._host_slots_lock = threading.Lock()
+        
     def load_data(self):
         """Load existing company and job data"""
         try:
-            with open(self.companies_file, 'r') as f:
-                self.companies = json.load(f)
+            self.companies = read_json(self.companies_file)
         except FileNotFoundError:
             self.companies = {}
             
         try:
-            with open(self.jobs_file, 'r') as f:
-                self.previous_jobs = json.load(f)
+            self.previous_jobs = read_json(self.jobs_file)
         except FileNotFoundError:
             self.previous_jobs = {}
+        
+        # ETag/Last-Modified validators and parsed jobs per scraped URL
+        try:
+            self.page_cache = read_json(self.page_cache_file)
+        except FileNotFoundError:
+            self.page_cache = {}
+        
+        # Gmail message ids are immutable, so an email only ever needs to be parsed once.
+        # Maps each processed id to the email's internalDate (ms since the epoch)
+        try:
+            processed_emails = read_json(self.processed_emails_file)
+        except FileNotFoundError:
+            processed_emails = {}
+        if isinstance(processed_emails, list):
+            # Older versions kept bare ids; date them now so they expire like the rest
+            now_ms = int(time.time() * 1000)
+            processed_emails = dict.fromkeys(processed_emails, now_ms)
+        self.processed_emails = processed_emails
+        
+        # Titles seen per company, kept alongside previous_jobs for fast lookups
+        self._prev_titles = {key: {job['title'] for job in jobs}
+                             for key, jobs in self.previous_jobs.items()}
     
     def save_data(self):
-        """Save company and job data"""
-        with open(self.companies_file, 'w') as f:
-            json.dump(self.companies, f, indent=2)
-        with open(self.jobs_file, 'w') as f:
-            json.dump(self.previous_jobs, f, indent=2)
+        """Save company and job data that changed since the last save"""
+        # Unchanged data is not even serialized
+        if 'companies' in self._dirty:
+            write_json(self.companies_file, self.companies)
+        if 'previous_jobs' in self._dirty:
+            write_json(self.jobs_file, self.previous_jobs)
+        if 'page_cache' in self._dirty:
+            write_json(self.page_cache_file, self.page_cache)
+        if 'processed_emails' in self._dirty:
+            write_json(self.processed_emails_file, dict(sorted(self.processed_emails.items())))
+        self._dirty.clear()
     
     def authenticate_gmail(self):
         """Authenticate with Gmail API"""
+        # Reuse the client built earlier in this process
+        if self._gmail_service is not None:
+            return self._gmail_service
+        
+        # Google client libraries are imported here so TEST_MODE runs don't pay for them
+        from google.oauth2.credentials import Credentials
+        from googleapiclient.discovery import build
+        
         creds = None
-        if os.path.exists('token.pickle'):
+        save_creds = False
+        if os.path.exists(self.token_file):
+            creds = Credentials.from_authorized_user_info(read_json(self.token_file), SCOPES)
+        elif os.path.exists('token.pickle'):
+            # Migrate credentials saved by older versions
+            import pickle
             with open('token.pickle', 'rb') as token:
                 creds = pickle.load(token)
+            save_creds = True
         
         if not creds or not creds.valid:
             if creds and creds.expired and creds.refresh_token:
+                from google.auth.transport.requests import Request
                 creds.refresh(Request())
             else:
+                from google_auth_oauthlib.flow import InstalledAppFlow
                 flow = InstalledAppFlow.from_client_secrets_file(
                     'credentials.json', SCOPES)
                 creds = flow.run_local_server(port=0)
-            with open('token.pickle', 'wb') as token:
-                pickle.dump(creds, token)
+            save_creds = True
         
-        return build('gmail', 'v1', credentials=creds)
+        if save_creds:
+            write_json(self.token_file, json.loads(creds.to_json()))
+        
+        # Use the discovery document bundled with googleapiclient instead of fetching it
+        self._gmail_service = build('gmail', 'v1', credentials=creds,
+                                    static_discovery=True, cache_discovery=False)
+        return self._gmail_service
     
-    def get_recent_emails(self, gmail_service, days_back=7):
-        """Get recent 'Funded and Hiring' emails"""
-        # Calculate date for search
-        since_date = (datetime.now() - timedelta(days=days_back)).strftime('%Y/%m/%d')
-        
-        # Try multiple search queries
-        search_queries = [
-            f'subject:"funded and hiring" after:{since_date}',
-            f'subject:"funded & hiring" after:{since_date}',
-            f'funded hiring after:{since_date}',
-            f'subject:funded subject:hiring after:{since_date}'
-        ]
-        
-        all_email_contents = []
-        
-        for query in search_queries:
-            print(f"Searching Gmail with query: {query}")
-            
-            results = gmail_service.users().messages().list(
-                userId='me', q=query).execute()
-            
-            messages = results.get('messages', [])
-            print(f"Found {len(messages)} emails with query: {query}")
-            
-            for message in messages:
-                msg = gmail_service.users().messages().get(
-                    userId='me', id=message['id']).execute()
-                
-                # Get subject line for debugging
-                headers = msg['payload'].get('headers', [])
-                subject = next((h['value'] for h in headers if h['name'].lower() == 'subject'), 'No Subject')
-                print(f"Email subject: {subject}")
-                
-                # Extract email body
-                payload = msg['payload']
-                body = self.extract_email_body(payload)
-                if body:
-                    all_email_contents.append({
-                        'date': msg['internalDate'],
-                        'body': body,
-                        'subject': subject
-                    })
-            
-            if messages:
-                break  # Stop after first successful query
+    def search_emails(self, gmail_service, days_back=7):
+        """Return the ids of 'Funded and Hiring' emails from the last days_back days"""
+        # One server-side query covering every subject variant of the newsletter
+        query = (f'(subject:"funded and hiring" OR subject:"funded & hiring" OR (funded hiring)) '
+                 f'newer_than:{days_back}d')
+        if self.newsletter_sender:
+            query += f' from:({self.newsletter_sender})'
+        
+        print(f"Searching Gmail with query: {query}")
+        
+        results = gmail_service.users().messages().list(
+            userId='me', q=query).execute()
+        
+        messages = results.get('messages', [])
+        print(f"Found {len(messages)} emails with query: {query}")
+        return [message['id'] for message in messages]
+    
+    def get_recent_emails(self, gmail_service, message_ids):
+        """Yield the not yet processed emails among message_ids one at a time"""
+        # Fetch subjects first so bodies are only downloaded for the newsletter itself
+        subjects = {}
+        new_ids = [message_id for message_id in message_ids
+                   if message_id not in self.processed_emails]
+        print(f"{len(message_ids) - len(new_ids)} of these emails were already processed")
+        for msg in self.fetch_messages(gmail_service, new_ids, format='metadata',
+                                       metadataHeaders=['Subject'], fields=GMAIL_SUBJECT_FIELDS):
+            headers = msg.get('payload', {}).get('headers', [])
+            subject = next((h['value'] for h in headers if h['name'].lower() == 'subject'), 'No Subject')
+            print(f"Email subject: {subject}")
+            if _SUBJECT_RE.search(subject):
+                subjects[msg['id']] = subject
+            else:
+                self.processed_emails[msg['id']] = int(msg['internalDate'])
+        
+        found = 0
+        for msg in self.fetch_messages(gmail_service, list(subjects), format='full',
+                                       fields=GMAIL_MESSAGE_FIELDS):
+            # Extract email body
+            payload = msg['payload']
+            body = self.extract_email_body(payload)
+            if body:
+                found += 1
+                yield {
+                    'id': msg['id'],
+                    'date': msg['internalDate'],
+                    'body': body,
+                    'subject': subjects[msg['id']]
+                }
+            else:
+                self.processed_emails[msg['id']] = int(msg['internalDate'])
         
-        print(f"Total emails found across all queries: {len(all_email_contents)}")
-        return all_email_contents
+        print(f"Total emails found: {found}")
+    
+    def fetch_messages(self, gmail_service, message_ids, **params):
+        """Yield messages fetched with batched Gmail API requests, one chunk at a time"""
+        from googleapiclient.errors import HttpError
+        
+        fetched = {}
+        
+        def collect(request_id, response, exception):
+            if exception is not None:
+                print(f"Error fetching message {request_id}: {str(exception)}")
+                return
+            fetched[request_id] = response
+        
+        # One HTTP round trip per chunk instead of one per message
+        for start in range(0, len(message_ids), GMAIL_BATCH_SIZE):
+            chunk = message_ids[start:start + GMAIL_BATCH_SIZE]
+            batch = gmail_service.new_batch_http_request(callback=collect)
+            for message_id in chunk:
+                batch.add(gmail_service.users().messages().get(
+                    userId='me', id=message_id, **params), request_id=message_id)
+            
+            try:
+                batch.execute()
+            except HttpError as e:
+                # Fall back to individual requests if the batch endpoint is rejected
+                print(f"Batch request failed, fetching messages individually: {str(e)}")
+                for message_id in chunk:
+                    if message_id not in fetched:
+                        fetched[message_id] = gmail_service.users().messages().get(
+                            userId='me', id=message_id, **params).execute()
+            
+            # Preserve the order returned by messages().list(), and drop each chunk
+            # once it is consumed so only one chunk of bodies is held at a time
+            for message_id in chunk:
+                if message_id in fetched:
+                    yield fetched.pop(message_id)
     
     def extract_email_body(self, payload):
         """Extract text content from email payload"""
-        body = ""
-        
-        # Handle multipart emails
-        if 'parts' in payload:
-            for part in payload['parts']:
-                if part['mimeType'] == 'text/plain' and 'data' in part['body']:
-                    data = part['body']['data']
-                    body = base64.urlsafe_b64decode(data).decode('utf-8')
-                    break
-                elif part['mimeType'] == 'text/html' and 'data' in part['body'] and not body:
-                    # Fall back to HTML if no plain text
-                    data = part['body']['data']
-                    html_content = base64.urlsafe_b64decode(data).decode('utf-8')
-                    # Strip HTML tags for basic text extraction
-                    soup = BeautifulSoup(html_content, 'html.parser')
-                    body = soup.get_text()
-        # Handle single part emails
-        elif payload['mimeType'] == 'text/plain' and 'data' in payload['body']:
-            data = payload['body']['data']
-            body = base64.urlsafe_b64decode(data).decode('utf-8')
-        elif payload['mimeType'] == 'text/html' and 'data' in payload['body']:
-            data = payload['body']['data']
-            html_content = base64.urlsafe_b64decode(data).decode('utf-8')
-            # Strip HTML tags for basic text extraction
-            soup = BeautifulSoup(html_content, 'html.parser')
-            body = soup.get_text()
-        
-        return body
+        html_data = None
+        
+        # Walk nested multipart payloads in order, stopping at the first plain text part
+        stack = [payload]
+        while stack:
+            part = stack.pop()
+            if part.get('parts'):
+                stack.extend(reversed(part['parts']))
+                continue
+            
+            data = part.get('body', {}).get('data')
+            if not data:
+                continue
+            if part.get('mimeType') == 'text/plain':
+                return base64.urlsafe_b64decode(data).decode('utf-8', errors='replace')
+            if part.get('mimeType') == 'text/html' and html_data is None:
+                html_data = data
+        
+        if html_data is None:
+            return ""
+        
+        # Fall back to HTML if no plain text
+        html_content = base64.urlsafe_b64decode(html_data).decode('utf-8', errors='replace')
+        return html_to_text(html_content)
     
     def parse_funded_hiring_email(self, email_body):
         """Parse company info from 'Funded and Hiring' email"""
@@ -149,30 +409,26 @@ class JobTracker:
         
         print(f"Parsing email body of length: {len(email_body)}")
         
-        # Look for company names followed by funding info
-        lines = email_body.split('\n')
-        
         current_company = None
-        for i, line in enumerate(lines):
-            line = line.strip()
-            
-            # Skip empty lines and common newsletter text
-            if not line or any(skip in line.lower() for skip in [
-                'funded & hiring', 'biweekly newsletter', 'subscribe', 'forwarded', 
-                'startup funding', 'job alerts', 'stay up to date', 'sunday'
-            ]):
+        skip_line_start = skip_line = None
+        for match in _COMPANY_OR_URL_RE.finditer(email_body):
+            # Skip common newsletter text, checking each line only once
+            line_start = email_body.rfind('\n', 0, match.start()) + 1
+            if line_start != skip_line_start:
+                line_end = email_body.find('\n', line_start)
+                if line_end == -1:
+                    line_end = len(email_body)
+                skip_line_start = line_start
+                skip_line = bool(_SKIP_LINE_RE.search(email_body, line_start, line_end))
+            if skip_line:
                 continue
             
-            # Look for company names - typically standalone lines before funding info
-            next_line = lines[i + 1].strip() if i + 1 < len(lines) else ""
-            
-            # If next line starts with "Funding Amount:", current line is likely company name
-            if next_line.startswith('Funding Amount:') and line:
-                # Clean up company name (remove any formatting)
-                company_name = line.strip()
-                # Remove any common prefixes or suffixes
-                company_name = re.sub(r'^[•\-\*\s]+', '', company_name)
-                company_name = re.sub(r'\s+$', '', company_name)
+            url = match.group('url')
+            if url is None:
+                # Company names are standalone lines before the funding info
+                company_name = match.group('company')
+                # Remove any common prefixes (the match already excludes surrounding whitespace)
+                company_name = _PREFIX_RE.sub('', company_name)
                 
                 if company_name and len(company_name) < 100:
                     current_company = company_name
@@ -182,25 +438,19 @@ class JobTracker:
                         'date_added': datetime.now().isoformat()
                     }
                     print(f"Found company: {company_name}")
+                continue
             
-            # Look for any URLs in the content that might be company websites
-            urls = re.findall(r'https?://[^\s\)]+', line)
-            for url in urls:
-                # Clean the URL
-                url = url.rstrip('.,;)')
-                
-                # Skip common newsletter/tracking URLs
-                if any(skip in url.lower() for skip in [
-                    'subscribe', 'unsubscribe', 'track', 'utm_', 'mailchi',
-                    'email', 'newsletter', 'substack'
-                ]):
-                    continue
-                
-                # If we have a current company, assign the URL
-                if current_company and current_company in companies:
-                    if not companies[current_company]['website']:
-                        companies[current_company]['website'] = url
-                        print(f"Found URL for {current_company}: {url}")
+            # Clean the URL
+            url = url.rstrip('.,;)')
+            
+            # Skip common newsletter/tracking URLs
+            if _SKIP_URL_RE.search(url):
+                continue
+            
+            # If we have a current company, assign the URL
+            if current_company and not companies[current_company]['website']:
+                companies[current_company]['website'] = url
+                print(f"Found URL for {current_company}: {url}")
         
         print(f"Parsed {len(companies)} companies from email")
         return companies
@@ -217,162 +467,185 @@ class JobTracker:
                 print(f"Company already being tracked: {company}")
         
         if added_count > 0:
+            self._dirty.add('companies')
             self.save_data()
             print(f"Saved {added_count} new companies to companies.json")
         
         return added_count
     
+    def fetch(self, url, **kwargs):
+        """GET a URL, limiting how many requests hit the same host at once"""
+        host = urlparse(url).netloc
+        with self._host_slots_lock:
+            slot = self._host_slots.setdefault(host, threading.BoundedSemaphore(MAX_REQUESTS_PER_HOST))
+        
+        with slot:
+            return self.http.get(url, timeout=10, **kwargs)
+    
     def scrape_job_page(self, url, company_name):
         """Scrape jobs from a company's job page"""
         if not url:
             return []
+        self._scraped_urls.add(url)
         
         try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
-            
-            response = requests.get(url, headers=headers, timeout=10)
+            # Ask the server to skip the body if the page hasn't changed since the last scrape
+            cached = self.page_cache.get(url)
+            headers = {}
+            if cached:
+                if cached.get('etag'):
+                    headers['If-None-Match'] = cached['etag']
+                if cached.get('last_modified'):
+                    headers['If-Modified-Since'] = cached['last_modified']
+            
+            response = self.fetch(url, headers=headers)
+            if response.status_code == 304 and cached:
+                return [dict(job, company=company_name) for job in cached['jobs']]
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
+            jobs = self.parse_jobs(response.content, url, company_name)
             
-            # Common job listing selectors for popular ATS platforms
-            job_selectors = [
-                # Greenhouse
-                '.opening',
-                '.opening-title',
-                '[data-test="job-title"]',
-                # Lever
-                '.posting-title',
-                '.posting',
-                # Workday
-                '[data-automation-id*="job"]',
-                # BambooHR
-                '.BambooHR-ATS-Jobs-Item',
-                # Generic patterns
-                '.job-title',
-                '.job-listing',
-                '.position',
-                '.role',
-                'h3 a[href*="job"]',
-                'a[href*="position"]',
-                'a[href*="career"]'
-            ]
-            
-            jobs = []
-            for selector in job_selectors:
-                elements = soup.select(selector)
-                for element in elements:
-                    job_title = element.get_text(strip=True)
-                    
-                    # Skip if this looks like engineering or legal
-                    if self.should_exclude_role(job_title):
-                        continue
-                        
-                    if job_title and len(job_title) > 3:
-                        # Try to get the job URL
-                        job_url = ""
-                        if element.name == 'a':
-                            job_url = element.get('href', '')
-                        else:
-                            link = element.find('a')
-                            if link:
-                                job_url = link.get('href', '')
-                        
-                        # Make relative URLs absolute
-                        if job_url.startswith('/'):
-                            from urllib.parse import urljoin
-                            job_url = urljoin(url, job_url)
-                        
-                        jobs.append({
-                            'title': job_title,
-                            'url': job_url,
-                            'company': company_name,
-                            'scraped_date': datetime.now().isoformat()
-                        })
-                
-                if jobs:  # If we found jobs with this selector, stop trying others
-                    break
-            
-            # Remove duplicates
-            seen_titles = set()
-            unique_jobs = []
-            for job in jobs:
-                if job['title'] not in seen_titles:
-                    seen_titles.add(job['title'])
-                    unique_jobs.append(job)
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+            if etag or last_modified:
+                self.page_cache[url] = {
+                    'etag': etag,
+                    'last_modified': last_modified,
+                    'jobs': jobs
+                }
+            else:
+                self.page_cache.pop(url, None)
             
-            return unique_jobs[:20]  # Limit to prevent spam
+            return jobs
             
         except Exception as e:
             print(f"Error scraping {company_name} ({url}): {str(e)}")
             return []
     
+    def parse_jobs(self, content, url, company_name):
+        """Extract job postings from a job page's HTML"""
+        # Pages that can't match any selector aren't worth parsing
+        if not _JOB_HINT_RE.search(content):
+            return []
+        
+        # Runs on the scraper's worker threads, so parsing one page overlaps
+        # with other pages still downloading
+        soup = BeautifulSoup(content, 'lxml', parse_only=JOB_STRAINER)
+        
+        # Walk the tree once for all selectors, then keep the candidates of the
+        # first selector that matches any (in document order, as select() would)
+        candidates = _JOB_SELECTOR_UNION.select(soup)
+        
+        jobs = []
+        seen_titles = set()
+        for pattern in _JOB_SELECTOR_PATTERNS:
+            if not candidates:
+                break
+            elements = [element for element in candidates if pattern.match(element)]
+            for element in elements:
+                job_title = element.get_text(strip=True)
+                
+                # Skip duplicates, too-short titles and engineering or legal roles
+                if (job_title in seen_titles or len(job_title) <= 3
+                        or self.should_exclude_role(job_title)):
+                    continue
+                seen_titles.add(job_title)
+                
+                # Try to get the job URL
+                job_url = ""
+                if element.name == 'a':
+                    job_url = element.get('href', '')
+                else:
+                    link = element.find('a')
+                    if link:
+                        job_url = link.get('href', '')
+                
+                # Make relative URLs absolute
+                if job_url.startswith('/'):
+                    from urllib.parse import urljoin
+                    job_url = urljoin(url, job_url)
+                
+                jobs.append({
+                    'title': job_title,
+                    'url': job_url,
+                    'company': company_name,
+                    'scraped_date': datetime.now().isoformat()
+                })
+                
+                if len(jobs) >= MAX_JOBS_PER_PAGE:
+                    break
+            
+            if jobs:  # If we found jobs with this selector, stop trying others
+                break
+        
+        return jobs
+    
     def should_exclude_role(self, job_title):
         """Check if role should be excluded (engineering/legal)"""
-        exclude_keywords = [
-            'engineer', 'engineering', 'developer', 'software', 'frontend', 
-            'backend', 'full stack', 'devops', 'sre', 'legal', 'counsel', 
-            'attorney', 'lawyer', 'paralegal'
-        ]
-        
-        job_lower = job_title.lower()
-        return any(keyword in job_lower for keyword in exclude_keywords)
+        return bool(_EXCLUDE_RE.search(job_title))
+    
+    def scrape_company(self, company, info):
+        """Scrape the jobs page, or careers pages found on the website, for one company"""
+        print(f"Checking {company}...")
+        
+        # Try jobs page first, then website
+        jobs_from_page = []
+        if info.get('jobs_page'):
+            jobs_from_page = self.scrape_job_page(info['jobs_page'], company)
+        
+        if not jobs_from_page and info.get('website'):
+            # Try to find careers page on main website
+            careers_urls = self.find_careers_page(info['website'])
+            for careers_url in careers_urls:
+                jobs_from_page = self.scrape_job_page(careers_url, company)
+                if jobs_from_page:
+                    break
+        
+        return jobs_from_page
     
     def check_for_new_jobs(self):
         """Check all tracked companies for new job postings"""
         new_jobs = []
+        tracked = list(self.companies.items())
         
-        for company, info in self.companies.items():
-            print(f"Checking {company}...")
-            
-            # Try jobs page first, then website
-            jobs_from_page = []
-            if info.get('jobs_page'):
-                jobs_from_page = self.scrape_job_page(info['jobs_page'], company)
-            
-            if not jobs_from_page and info.get('website'):
-                # Try to find careers page on main website
-                careers_urls = self.find_careers_page(info['website'])
-                for careers_url in careers_urls:
-                    jobs_from_page = self.scrape_job_page(careers_url, company)
-                    if jobs_from_page:
-                        break
-            
-            # Compare with previous jobs to find new ones
-            company_key = company.lower().replace(' ', '_')
-            previous_jobs = self.previous_jobs.get(company_key, [])
-            previous_titles = {job['title'] for job in previous_jobs}
-            
-            for job in jobs_from_page:
-                if job['title'] not in previous_titles:
-                    new_jobs.append(job)
+        # Scraping is network-bound, so overlap the page fetches across companies
+        with ThreadPoolExecutor(max_workers=SCRAPE_WORKERS) as executor:
+            results = executor.map(lambda item: self.scrape_company(*item), tracked)
             
-            # Update previous jobs
-            self.previous_jobs[company_key] = jobs_from_page
-        
+            for (company, info), jobs_from_page in zip(tracked, results):
+                # Compare with previous jobs to find new ones
+                company_key = company.lower().replace(' ', '_')
+                previous_titles = self._prev_titles.get(company_key, frozenset())
+                
+                for job in jobs_from_page:
+                    if job['title'] not in previous_titles:
+                        new_jobs.append(job)
+                
+                # Update previous jobs
+                self.previous_jobs[company_key] = jobs_from_page
+                self._prev_titles[company_key] = {job['title'] for job in jobs_from_page}
+        
+        # Drop cached pages that are no longer scraped
+        self.page_cache = {url: entry for url, entry in self.page_cache.items()
+                           if url in self._scraped_urls}
+        self._dirty.update(('previous_jobs', 'page_cache'))
         self.save_data()
         return new_jobs
     
     def find_careers_page(self, website_url):
         """Try to find careers/jobs page on company website"""
         try:
-            response = requests.get(website_url, timeout=10)
-            soup = BeautifulSoup(response.content, 'html.parser')
+            response = self.fetch(website_url)
+            doc = lxml.html.fromstring(response.content)
             
             careers_links = []
-            # Look for common careers page patterns
-            for link in soup.find_all('a', href=True):
-                href = link['href'].lower()
-                text = link.get_text().lower()
-                
-                if any(word in href or word in text for word in ['career', 'job', 'hiring', 'work']):
-                    full_url = link['href']
-                    if full_url.startswith('/'):
-                        from urllib.parse import urljoin
-                        full_url = urljoin(website_url, full_url)
-                    careers_links.append(full_url)
+            # Look for common careers page patterns; the XPath filter runs inside lxml
+            for href in _CAREERS_LINKS_XPATH(doc):
+                full_url = str(href)
+                if full_url.startswith('/'):
+                    from urllib.parse import urljoin
+                    full_url = urljoin(website_url, full_url)
+                careers_links.append(full_url)
             
             return careers_links[:3]  # Return top 3 candidates
             
@@ -397,19 +670,21 @@ class JobTracker:
         # Create email content
         subject = f"🚀 {len(new_jobs)} New Job Opportunities - {datetime.now().strftime('%B %d, %Y')}"
         
-        body = f"Found {len(new_jobs)} new job postings from {len(jobs_by_company)} companies:\n\n"
+        # Collect fragments and join once instead of repeatedly copying the body
+        parts = [f"Found {len(new_jobs)} new job postings from {len(jobs_by_company)} companies:\n\n"]
         
         for company, jobs in jobs_by_company.items():
-            body += f"📍 {company} ({len(jobs)} new roles):\n"
+            parts.append(f"📍 {company} ({len(jobs)} new roles):\n")
             for job in jobs:
-                body += f"  • {job['title']}"
+                parts.append(f"  • {job['title']}")
                 if job['url']:
-                    body += f" - {job['url']}"
-                body += "\n"
-            body += "\n"
+                    parts.append(f" - {job['url']}")
+                parts.append("\n")
+            parts.append("\n")
         
-        body += f"\nTotal companies being tracked: {len(self.companies)}\n"
-        body += f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+        parts.append(f"\nTotal companies being tracked: {len(self.companies)}\n")
+        parts.append(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        body = ''.join(parts)
         
         # Send email using environment variables
         self.send_email(subject, body)
@@ -428,6 +703,9 @@ class JobTracker:
             print(f"Body: {body}")
             return
         
+        from email.mime.text import MIMEText
+        from email.mime.multipart import MIMEMultipart
+        
         try:
             msg = MIMEMultipart()
             msg['From'] = sender_email
@@ -436,34 +714,75 @@ class JobTracker:
             
             msg.attach(MIMEText(body, 'plain'))
             
-            server = smtplib.SMTP(smtp_server, smtp_port)
-            server.starttls()
-            server.login(sender_email, sender_password)
+            server = self.get_smtp_connection(smtp_server, smtp_port, sender_email, sender_password)
             text = msg.as_string()
             server.sendmail(sender_email, recipient_email, text)
-            server.quit()
             
             print(f"Email sent successfully to {recipient_email}")
             
         except Exception as e:
+            # Don't reuse a connection that may be in a bad state
+            self.close_smtp()
             print(f"Failed to send email: {str(e)}")
             print(f"Subject: {subject}")
             print(f"Body: {body}")
     
+    def get_smtp_connection(self, smtp_server, smtp_port, sender_email, sender_password):
+        """Return a logged-in SMTP connection, reusing the open one while it is alive"""
+        import smtplib
+        
+        if self._smtp is not None:
+            try:
+                if self._smtp.noop()[0] == 250:
+                    return self._smtp
+            except (smtplib.SMTPException, OSError):
+                pass
+            self.close_smtp()
+        
+        if smtp_port == 465:
+            # Implicit TLS skips the STARTTLS round trip
+            server = smtplib.SMTP_SSL(smtp_server, smtp_port)
+        else:
+            server = smtplib.SMTP(smtp_server, smtp_port)
+            server.starttls()
+        server.login(sender_email, sender_password)
+        
+        self._smtp = server
+        return server
+    
+    @contextlib.contextmanager
+    def smtp_session(self):
+        """Keep one SMTP connection open for every email sent inside the block"""
+        try:
+            yield
+        finally:
+            self.close_smtp()
+    
+    def close_smtp(self):
+        """Close the SMTP connection if one is open"""
+        if self._smtp is None:
+            return
+        import smtplib
+        try:
+            self._smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            pass
+        self._smtp = None
+    
     def check_new_funded_hiring_emails(self, gmail_service):
         """Check for new 'Funded and Hiring' emails and parse them"""
         # First try with 7 days, then try 30 days if nothing found
-        emails = self.get_recent_emails(gmail_service, days_back=7)
-        
-        if not emails:
-            print("No emails found in last 7 days, trying last 30 days...")
-            emails = self.get_recent_emails(gmail_service, days_back=30)
-        
-        print(f"Processing {len(emails)} emails...")
+        message_ids = self.search_emails(gmail_service, days_back=7)
+        if not message_ids:
+            print(f"No emails found in last 7 days, trying last {EMAIL_FALLBACK_DAYS} days...")
+            message_ids = self.search_emails(gmail_service, days_back=EMAIL_FALLBACK_DAYS)
         
         new_companies_added = 0
-        for i, email in enumerate(emails):
-            print(f"Processing email {i+1}: {email.get('subject', 'No Subject')}")
+        processed = 0
+        # Emails are parsed as they arrive, so each body is freed once it is parsed
+        for email in self.get_recent_emails(gmail_service, message_ids):
+            processed += 1
+            print(f"Processing email {processed}: {email.get('subject', 'No Subject')}")
             print(f"Email body length: {len(email['body'])} characters")
             print(f"First 500 characters of email body:")
             print(email['body'][:500])
@@ -477,7 +796,18 @@ class JobTracker:
             # Add new companies to tracking
             added = self.add_companies_to_tracking(companies_from_email)
             new_companies_added += added
+            self.processed_emails[email['id']] = int(email['date'])
         
+        print(f"Processed {processed} emails")
+        
+        # Remember processed emails so later runs skip fetching and parsing them, but
+        # only while they are recent enough for a search to return them
+        cutoff_ms = (time.time() - EMAIL_FALLBACK_DAYS * 86400) * 1000
+        self.processed_emails = {message_id: date
+                                 for message_id, date in self.processed_emails.items()
+                                 if date >= cutoff_ms}
+        self._dirty.add('processed_emails')
+        self.save_data()
         print(f"Total new companies added: {new_companies_added}")
         return new_companies_added
     
@@ -485,35 +815,37 @@ class JobTracker:
         """Main function to run daily job checking"""
         print(f"Starting daily job check at {datetime.now()}")
         
-        try:
-            # Authenticate with Gmail
-            gmail_service = self.authenticate_gmail()
-            
-            # Check for new companies from recent emails
-            new_companies = self.check_new_funded_hiring_emails(gmail_service)
-            if new_companies > 0:
-                print(f"Added {new_companies} new companies from recent emails")
-            else:
-                print("No new companies added from recent emails")
-            
-            # Check all tracked companies for new jobs
-            print(f"Checking {len(self.companies)} companies for new job postings...")
-            new_jobs = self.check_for_new_jobs()
-            
-            print(f"Found {len(new_jobs)} new job postings")
-            
-            # Send digest email if there are new jobs
-            if new_jobs:
-                self.send_digest_email(new_jobs)
-            
-            print("Daily check completed successfully")
-            
-        except Exception as e:
-            print(f"Error during daily check: {str(e)}")
-            # Send error notification
-            error_subject = "⚠️ Job Tracker Error"
-            error_body = f"Error occurred during daily job check:\n\n{str(e)}\n\nTime: {datetime.now()}"
-            self.send_email(error_subject, error_body)
+        # Digest and error emails share one SMTP connection, closed on the way out
+        with self.smtp_session():
+            try:
+                # Authenticate with Gmail
+                gmail_service = self.authenticate_gmail()
+                
+                # Check for new companies from recent emails
+                new_companies = self.check_new_funded_hiring_emails(gmail_service)
+                if new_companies > 0:
+                    print(f"Added {new_companies} new companies from recent emails")
+                else:
+                    print("No new companies added from recent emails")
+                
+                # Check all tracked companies for new jobs
+                print(f"Checking {len(self.companies)} companies for new job postings...")
+                new_jobs = self.check_for_new_jobs()
+                
+                print(f"Found {len(new_jobs)} new job postings")
+                
+                # Send digest email if there are new jobs
+                if new_jobs:
+                    self.send_digest_email(new_jobs)
+                
+                print("Daily check completed successfully")
+                
+            except Exception as e:
+                print(f"Error during daily check: {str(e)}")
+                # Send error notification
+                error_subject = "⚠️ Job Tracker Error"
+                error_body = f"Error occurred during daily job check:\n\n{str(e)}\n\nTime: {datetime.now()}"
+                self.send_email(error_subject, error_body)
 
 def main():
     """Main entry point"""
@@ -1,38 +1,97 @@
 import streamlit as st
 import json
+import os
+import heapq
 import pandas as pd
 from datetime import datetime
-import requests
-from bs4 import BeautifulSoup
 import re
 
+try:
+    import orjson
+except ImportError:  # fall back to the standard library parser
+    orjson = None
+
 st.set_page_config(
     page_title="Job Tracker Dashboard",
     page_icon="🚀",
     layout="wide"
 )
 
-# Load data
-@st.cache_data
+# Patterns used while parsing pasted emails
+_DASH_RE = re.compile(r'\s*[-–—]\s*')
+_URL_RE = re.compile(r'https?://[^\s]+')
+# Lines starting with these hold links, not company names
+_LINE_PREFIXES = ('http', 'www', 'Website:', 'Jobs:', 'Careers:')
+# Newsletter words that rule a line out as a company name
+_STOPWORDS = frozenset(('the', 'and', 'funded', 'hiring'))
+
+def _read_json(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    return orjson.loads(data) if orjson else json.loads(data)
+
+def _dump_json(data):
+    if orjson:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    return json.dumps(data, indent=2).encode('utf-8')
+
+# Load data once per process. The dicts are shared across reruns and edited in place
+# by the add/remove actions, so cache_resource is used to skip cache_data's
+# pickling of the whole return value on every call
+@st.cache_resource
 def load_companies():
     try:
-        with open('companies.json', 'r') as f:
-            return json.load(f)
+        return _read_json('companies.json')
     except FileNotFoundError:
         return {}
 
-@st.cache_data
+@st.cache_resource
 def load_previous_jobs():
     try:
-        with open('previous_jobs.json', 'r') as f:
-            return json.load(f)
+        return _read_json('previous_jobs.json')
     except FileNotFoundError:
         return {}
 
+@st.cache_resource
+def _data_version():
+    # Process-wide count of saves, kept in a list so it can be bumped in place
+    return [0]
+
+def _write_json(path, data):
+    # Write to a temporary file first so a crash can't leave a half-written file
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(_dump_json(data))
+    os.replace(tmp_path, path)
+    # Every edit to the shared data is saved through here, so this invalidates _compute_stats
+    _data_version()[0] += 1
+
+@st.cache_data(show_spinner=False, max_entries=1)
+def _compute_stats(version, today, _companies, _previous_jobs, _keys):
+    """Header metrics, recomputed only after a save or when the date changes"""
+    total_jobs = sum(len(jobs) for jobs in _previous_jobs.values())
+    # date_added is an ISO timestamp, so its first 10 characters are the date
+    recent_companies = sum(1 for c in _companies.values() if c['date_added'][:10] == today)
+    companies_with_jobs = sum(1 for key in _keys.values() if key in _previous_jobs)
+    return total_jobs, recent_companies, companies_with_jobs
+
 def save_companies(companies):
-    with open('companies.json', 'w') as f:
-        json.dump(companies, f, indent=2)
+    _write_json('companies.json', companies)
 
+def mark_dirty(name):
+    """Record that 'companies' or 'jobs' changed and must be written by flush_pending"""
+    st.session_state.setdefault('_dirty', set()).add(name)
+
+def flush_pending(companies, previous_jobs):
+    """Write only the data files changed since the last flush"""
+    dirty = st.session_state.pop('_dirty', set())
+    if 'companies' in dirty:
+        _write_json('companies.json', companies)
+    if 'jobs' in dirty:
+        _write_json('previous_jobs.json', previous_jobs)
+
+# Cached, so it must stay pure: the caller stamps date_added when adding companies
+@st.cache_data(show_spinner=False, max_entries=16)
 def parse_funded_hiring_email(email_body):
     """Parse company info from 'Funded and Hiring' email"""
     companies = {}
@@ -41,26 +100,28 @@ def parse_funded_hiring_email(email_body):
     current_company = None
     for line in lines:
         line = line.strip()
+        low = line.lower()
         
         # Look for company names
-        if line and not line.startswith(('http', 'www', 'Website:', 'Jobs:', 'Careers:')):
-            if len(line) < 100 and not any(word in line.lower() for word in ['the', 'and', 'funded', 'hiring']):
-                company_name = re.split(r'\s*[-–—]\s*', line)[0].strip()
+        if line and not line.startswith(_LINE_PREFIXES):
+            if len(line) < 100 and not any(word in low for word in _STOPWORDS):
+                company_name = _DASH_RE.split(line)[0].strip()
                 if company_name:
                     current_company = company_name
                     companies[current_company] = {
                         'website': '',
-                        'jobs_page': '',
-                        'date_added': datetime.now().isoformat()
+                        'jobs_page': ''
                     }
         
-        # Look for URLs
-        elif current_company and ('http' in line or 'www' in line):
-            urls = re.findall(r'https?://[^\s]+', line)
+        # Look for URLs on lines starting with a link prefix; findall only matches
+        # 'http' links, so the line doesn't need scanning for them first
+        elif current_company and line:
+            urls = _URL_RE.findall(line)
+            is_jobs_line = 'job' in low or 'career' in low or 'hiring' in low
             for url in urls:
                 url = url.rstrip('.,;)')
                 
-                if any(keyword in line.lower() for keyword in ['job', 'career', 'hiring']):
+                if is_jobs_line:
                     companies[current_company]['jobs_page'] = url
                 elif not companies[current_company]['website']:
                     companies[current_company]['website'] = url
@@ -75,6 +136,11 @@ def main():
     companies = load_companies()
     previous_jobs = load_previous_jobs()
     
+    # previous_jobs is keyed by a normalized company name; work it out once per rerun
+    keys = {company: company.lower().replace(' ', '_') for company in companies}
+    # The first company with a given key wins, as with a scan over companies
+    key_to_name = {key: company for company, key in reversed(keys.items())}
+    
     # Sidebar for actions
     st.sidebar.header("Actions")
     
@@ -92,8 +158,10 @@ def main():
             
             if new_companies:
                 added_count = 0
+                date_added = datetime.now().isoformat()
                 for company, info in new_companies.items():
                     if company not in companies:
+                        info['date_added'] = date_added
                         companies[company] = info
                         added_count += 1
                 
@@ -135,40 +203,36 @@ def main():
         """)
         return
     
-    # Stats
+    # Stats; searching and filtering rerun the script but leave these unchanged
+    today = datetime.now().strftime('%Y-%m-%d')
+    total_jobs, recent_companies, companies_with_jobs = _compute_stats(
+        _data_version()[0], today, companies, previous_jobs, keys)
     col1, col2, col3, col4 = st.columns(4)
     with col1:
         st.metric("Companies Tracked", len(companies))
     with col2:
-        total_jobs = sum(len(jobs) for jobs in previous_jobs.values())
         st.metric("Total Jobs Found", total_jobs)
     with col3:
-        recent_companies = sum(1 for c in companies.values() 
-                             if datetime.fromisoformat(c['date_added']).date() == datetime.now().date())
         st.metric("Added Today", recent_companies)
     with col4:
-        companies_with_jobs = sum(1 for company in companies.keys() 
-                                if company.lower().replace(' ', '_') in previous_jobs)
         st.metric("Companies w/ Jobs", companies_with_jobs)
     
     # Companies table
     st.subheader("📊 Tracked Companies")
     
-    # Convert to DataFrame for display
-    df_data = []
-    for company, info in companies.items():
-        company_key = company.lower().replace(' ', '_')
-        job_count = len(previous_jobs.get(company_key, []))
-        
-        df_data.append({
-            'Company': company,
-            'Website': info.get('website', ''),
-            'Jobs Page': info.get('jobs_page', ''),
-            'Jobs Found': job_count,
-            'Date Added': datetime.fromisoformat(info['date_added']).strftime('%Y-%m-%d'),
-        })
+    # Convert to DataFrame for display, one column at a time
+    job_count_by_key = {key: len(jobs) for key, jobs in previous_jobs.items()}
+    infos = companies.values()
+    df_data = {
+        'Company': list(companies),
+        'Website': [info.get('website', '') for info in infos],
+        'Jobs Page': [info.get('jobs_page', '') for info in infos],
+        'Jobs Found': [job_count_by_key.get(key, 0) for key in keys.values()],
+        # ISO timestamps start with the date, so no need to parse them
+        'Date Added': [info['date_added'][:10] for info in infos],
+    }
     
-    if df_data:
+    if companies:
         df = pd.DataFrame(df_data)
         
         # Add filters
@@ -180,7 +244,7 @@ def main():
         
         # Apply filters
         if search_term:
-            df = df[df['Company'].str.contains(search_term, case=False)]
+            df = df[df['Company'].str.contains(search_term, case=False, regex=False, na=False)]
         
         if show_only_with_jobs:
             df = df[df['Jobs Found'] > 0]
@@ -200,38 +264,33 @@ def main():
         if previous_jobs:
             st.subheader("🆕 Recent Job Postings")
             
-            # Flatten all jobs with company names
+            # Flatten all jobs into (job, company name) pairs without copying the job dicts
             all_jobs = []
             for company_key, jobs in previous_jobs.items():
-                company_name = next((name for name in companies.keys() 
-                                   if name.lower().replace(' ', '_') == company_key), 
-                                   company_key.replace('_', ' ').title())
-                
-                for job in jobs:
-                    job_with_company = job.copy()
-                    job_with_company['company'] = company_name
-                    all_jobs.append(job_with_company)
+                company_name = key_to_name.get(company_key, company_key.replace('_', ' ').title())
+                all_jobs.extend((job, company_name) for job in jobs)
             
-            # Sort by scraped date
-            all_jobs.sort(key=lambda x: x.get('scraped_date', ''), reverse=True)
+            # Only the 20 most recently scraped jobs are shown, so skip sorting the rest
+            recent_jobs = heapq.nlargest(20, all_jobs, key=lambda x: x[0].get('scraped_date', ''))
             
             # Show recent jobs
-            for job in all_jobs[:20]:  # Show last 20 jobs
+            for job, company_name in recent_jobs:
                 with st.container():
                     col1, col2 = st.columns([3, 1])
                     with col1:
                         if job.get('url'):
-                            st.markdown(f"**[{job['title']}]({job['url']})** at {job['company']}")
+                            st.markdown(f"**[{job['title']}]({job['url']})** at {company_name}")
                         else:
-                            st.markdown(f"**{job['title']}** at {job['company']}")
+                            st.markdown(f"**{job['title']}** at {company_name}")
                     with col2:
                         scraped_date = job.get('scraped_date', '')
                         if scraped_date:
                             try:
                                 date_obj = datetime.fromisoformat(scraped_date.replace('Z', '+00:00'))
-                                st.caption(date_obj.strftime('%m/%d %H:%M'))
-                            except:
-                                st.caption(scraped_date[:10])
+                                caption = date_obj.strftime('%m/%d %H:%M')
+                            except ValueError:
+                                caption = scraped_date[:10]
+                            st.caption(caption)
     
     # Company management
     st.subheader("🛠️ Manage Companies")
@@ -246,14 +305,15 @@ def main():
         if st.button("Remove Selected Companies") and companies_to_remove:
             for company in companies_to_remove:
                 del companies[company]
+                mark_dirty('companies')
                 # Also remove from previous jobs
-                company_key = company.lower().replace(' ', '_')
+                company_key = keys[company]
                 if company_key in previous_jobs:
                     del previous_jobs[company_key]
+                    mark_dirty('jobs')
             
-            save_companies(companies)
-            with open('previous_jobs.json', 'w') as f:
-                json.dump(previous_jobs, f, indent=2)
+            # One write per changed file, however many companies were removed
+            flush_pending(companies, previous_jobs)
             
             st.success(f"Removed {len(companies_to_remove)} companies")
             st.rerun()